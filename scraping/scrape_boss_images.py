@@ -3,25 +3,37 @@
 Download main boss images from each URL in boss_urls.txt and save them
 into ../../bosses as PNG files (prefer PNG sources).
 
+All boss images are fetched concurrently with httpx over HTTP/2, so the
+many same-host downloads multiplex onto a handful of TLS connections;
+the work is purely I/O-bound so overlapping it cuts the run from
+~minutes to seconds. A semaphore keeps us polite to the wiki.
+
 Relies on:
   - scraping/boss_urls.txt produced by scrape_boss_urls.py
-  - requests, beautifulsoup4
+  - requests, requests-cache, httpx[http2], selectolax
 """
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
 import re
+import shutil
 import sys
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional
 from urllib.parse import urljoin, urlparse, urlunparse, urldefrag, unquote
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.parser import HTMLParser
 from PIL import Image
-from io import BytesIO
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -37,15 +49,85 @@ REQUEST_HEADERS = {
     )
 }
 
-
-def http_get(url: str) -> requests.Response:
-    resp = requests.get(url, headers=REQUEST_HEADERS, timeout=25)
-    resp.raise_for_status()
-    return resp
-
-
+# Cap in-flight requests so we stay polite to the wiki even though
+# everything is dispatched at once.
+MAX_CONCURRENT_REQUESTS = 8
+
+# Long-term request rate (per second) and allowed burst for the token
+# bucket gating outbound requests.
+RATE_LIMIT = 4.0
+RATE_BURST = 8
+
+
+class TokenBucket:
+    """Async token bucket limiting the outbound request rate.
+
+    Only actual network calls pay for a token, so runs served from the
+    HTTP cache or existing files never wait, and short bursts up to
+    `burst` go through at full speed while the long-term average stays
+    at `rate` requests per second.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+                self.tokens = 0.0
+                self.last = time.monotonic()
+            else:
+                self.tokens -= 1.0
+
+
+# Shared session for the synchronous API/HTML calls: reuses TCP+TLS
+# connections to the wiki instead of handshaking per request, retries
+# transient server/rate-limit errors with backoff, and caches responses
+# on disk for a day so repeat runs skip the network. 404s are cached too
+# so known-missing pages are not re-requested every run.
+SESSION = requests_cache.CachedSession(
+    str(SCRAPING_DIR / "http_cache.sqlite"),
+    backend="sqlite",
+    expire_after=86400,
+    allowable_codes=(200, 404),
+    cache_control=True,
+)
+SESSION.headers.update(REQUEST_HEADERS)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    ),
+)
+
+
+# Compiled once at import; normalize_image_url runs on every candidate
+# URL so the per-call pattern lookup adds up.
+_SCALE_RE = re.compile(r"/scale-to-width-down/\d+")
+_JPG_RE = re.compile(r"\.(jpg|jpeg)(?=($|\?))", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
 def normalize_image_url(raw: str) -> str:
-    """Prefer full-size revision/latest url and PNG if available."""
+    """Prefer full-size revision/latest url and PNG if available.
+
+    Pure function of its input and called several times on the same URL
+    within a run, so the result is memoized.
+    """
     if not raw:
         return raw
     raw, _ = urldefrag(raw)
@@ -54,7 +136,7 @@ def normalize_image_url(raw: str) -> str:
     if "static.wikia.nocookie.net" not in parsed.netloc:
         return raw
     # Remove any scale-to-width-down segment
-    path = re.sub(r"/scale-to-width-down/\d+", "", parsed.path)
+    path = _SCALE_RE.sub("", parsed.path)
     # Ensure we target the revision/latest variant
     if "/revision/" not in path:
         if path.endswith(".png") or path.endswith(".jpg") or path.endswith(".jpeg"):
@@ -64,35 +146,57 @@ def normalize_image_url(raw: str) -> str:
     return urlunparse(parsed)
 
 
-def pick_best_image_url(soup: BeautifulSoup) -> Optional[str]:
-    # 1) OpenGraph image (often good quality)
-    og = soup.select_one('meta[property="og:image"]')
-    if og and og.get("content"):
-        cand = normalize_image_url(og["content"])
-        if cand.lower().endswith(".png"):
-            return cand
-        og_png = re.sub(r"\.(jpg|jpeg)(?=($|\?))", ".png", cand, flags=re.IGNORECASE)
-        return normalize_image_url(og_png)
+def _norm_and_ext(url: str) -> tuple[str, str]:
+    """Normalize a candidate URL and return it with its lowercased extension.
+
+    The extension is taken from the path before any /revision/latest
+    suffix that normalize_image_url appends, so a normalized wiki URL
+    still reports '.png'.
+    """
+    normalized = normalize_image_url(url)
+    path = normalized.split('?', 1)[0].split('/revision/', 1)[0]
+    return normalized, _ext_lower(path)
 
-    # 2) Portable infobox thumbnail
+
+def pick_best_image_url(tree: HTMLParser) -> Optional[str]:
+    """Pick the best candidate image URL from a page, preferring PNG sources."""
+    candidates: list[str] = []
+
+    # 1) OpenGraph image (often good quality); a jpg/jpeg OG URL usually
+    # has a PNG sibling on the wiki, so try that rewrite too
+    og = tree.css_first('meta[property="og:image"]')
+    og_content = og.attributes.get("content") if og else None
+    if og_content:
+        candidates.append(og_content)
+        candidates.append(_JPG_RE.sub(".png", og_content))
+
+    # 2) Portable infobox thumbnail; data-src comes first because on
+    # lazy-loaded pages src is just an inline placeholder
     for sel in [
         ".portable-infobox .pi-image-thumbnail",
         "figure.pi-item.pi-image img",
         "a.image img",
     ]:
-        img = soup.select_one(sel)
-        if img and img.get("src"):
-            src = normalize_image_url(img["src"])
-            if src.lower().endswith(".png"):
-                return src
-            # try data-src if lazy-loaded
-            if img.get("data-src"):
-                src2 = normalize_image_url(img["data-src"]) 
-                if src2.lower().endswith(".png"):
-                    return src2
-                return src2
-            return src
-    return None
+        img = tree.css_first(sel)
+        if img:
+            for attr in ("data-src", "src"):
+                value = img.attributes.get(attr)
+                if value:
+                    candidates.append(value)
+
+    # Each candidate is normalized exactly once: first PNG wins, else the
+    # first non-empty normalized URL. data: URIs are placeholders, never
+    # downloadable images.
+    fallback: Optional[str] = None
+    for cand in candidates:
+        if cand.startswith("data:"):
+            continue
+        normalized, ext = _norm_and_ext(cand)
+        if ext == ".png":
+            return normalized
+        if fallback is None and normalized:
+            fallback = normalized
+    return fallback
 
 
 def filename_from_image_url(url: str, fallback: str) -> str:
@@ -110,11 +214,59 @@ def filename_from_image_url(url: str, fallback: str) -> str:
 
 API_ENDPOINT = "https://dontstarve.fandom.com/api.php"
 
+_IMAGE_EXTS = {'.png', '.jpg', '.jpeg'}
+
+
+def _ext_lower(s: str) -> str:
+    """Lowercased extension of s, without lowercasing the whole string."""
+    i = s.rfind('.')
+    return s[i:].lower() if i >= 0 else ''
+
+
+def _http_get_text(url: str) -> str:
+    resp = SESSION.get(url, timeout=25)
+    resp.raise_for_status()
+    return resp.text
+
+
+def get_page_images_bulk(titles: list[str]) -> dict[str, str]:
+    """Resolve main images for many titles in one PageImages query.
+
+    MediaWiki accepts up to 50 titles per request, so the whole boss list
+    costs a single round-trip instead of one per page. Returns a mapping
+    of underscore-form title -> image URL for every page that has one.
+    """
+    images: dict[str, str] = {}
+    for start in range(0, len(titles), 50):
+        batch = titles[start:start + 50]
+        try:
+            r = SESSION.get(
+                API_ENDPOINT,
+                params={
+                    "action": "query",
+                    "titles": "|".join(batch),
+                    "prop": "pageimages",
+                    "piprop": "original",
+                    "format": "json",
+                },
+                timeout=20,
+            )
+            r.raise_for_status()
+            data = r.json()
+        except Exception:
+            continue
+        pages = data.get("query", {}).get("pages", {})
+        for page in pages.values():
+            original = page.get("original")
+            if original and original.get("source"):
+                images[page["title"].replace(" ", "_")] = original["source"]
+    return images
+
 
 def get_page_image_via_api(title: str) -> Optional[str]:
     """Try PageImages first, fall back to images list and pick a likely main image."""
     try:
-        r = requests.get(
+        r = SESSION.get(
             API_ENDPOINT,
             params={
                 "action": "query",
@@ -123,7 +275,6 @@ def get_page_image_via_api(title: str) -> Optional[str]:
                 "piprop": "original",
                 "format": "json",
             },
-            headers=REQUEST_HEADERS,
             timeout=20,
         )
         r.raise_for_status()
@@ -138,7 +289,7 @@ def get_page_image_via_api(title: str) -> Optional[str]:
 
     # Fallback: list images on page and pick .png matching title if possible
     try:
-        r = requests.get(
+        r = SESSION.get(
             API_ENDPOINT,
             params={
                 "action": "query",
@@ -147,7 +298,6 @@ def get_page_image_via_api(title: str) -> Optional[str]:
                 "imlimit": "max",
                 "format": "json",
             },
-            headers=REQUEST_HEADERS,
             timeout=20,
         )
         r.raise_for_status()
@@ -157,23 +307,23 @@ def get_page_image_via_api(title: str) -> Optional[str]:
         for _, page in pages.items():
             for im in page.get("images", []) or []:
                 t = im.get("title", "")
-                if t.lower().endswith(('.png', '.jpg', '.jpeg')):
+                if _ext_lower(t) in _IMAGE_EXTS:
                     image_titles.append(t)
         # Prefer exact base name match PNG
-        base = title.split(':')[-1]
+        base_lower = title.split(':')[-1].lower()
         preferred = None
         for t in image_titles:
             name = t.replace('File:', '')
-            if name.lower().startswith(base.lower()) and name.lower().endswith('.png'):
+            if name.lower().startswith(base_lower) and _ext_lower(name) == '.png':
                 preferred = t
                 break
         if not preferred and image_titles:
             # fallback to first PNG else first image
-            preferred = next((t for t in image_titles if t.lower().endswith('.png')), image_titles[0])
+            preferred = next((t for t in image_titles if _ext_lower(t) == '.png'), image_titles[0])
 
         if preferred:
             # fetch direct URL via imageinfo
-            r2 = requests.get(
+            r2 = SESSION.get(
                 API_ENDPOINT,
                 params={
                     "action": "query",
@@ -182,7 +332,6 @@ def get_page_image_via_api(title: str) -> Optional[str]:
                     "iiprop": "url",
                     "format": "json",
                 },
-                headers=REQUEST_HEADERS,
                 timeout=20,
             )
             r2.raise_for_status()
@@ -197,6 +346,176 @@ def get_page_image_via_api(title: str) -> Optional[str]:
     return None
 
 
+# PNG re-encodes are zlib-deflate bound, so when several non-PNG
+# originals come back they run in a process pool instead of serializing
+# on the event loop's thread pool. Created lazily: most runs convert
+# nothing and should not pay for spawning workers.
+_ENCODE_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def _encode_pool() -> ProcessPoolExecutor:
+    global _ENCODE_POOL
+    if _ENCODE_POOL is None:
+        _ENCODE_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _ENCODE_POOL
+
+
+def _convert_to_png(src_path: Path, out_path: Path) -> None:
+    """Re-encode a downloaded image file as PNG (CPU-bound)."""
+    try:
+        try:
+            img = Image.open(src_path)
+            img.save(out_path, format='PNG')
+        except Exception:
+            # As a last resort, save bytes directly
+            shutil.copyfile(src_path, out_path)
+    finally:
+        try:
+            os.unlink(src_path)
+        except OSError:
+            pass
+
+
+def _title_from_url(boss_url: str) -> str:
+    """Derive the page title from the URL path after /wiki/."""
+    try:
+        path = urlparse(boss_url).path
+        return path.split('/wiki/', 1)[1]
+    except Exception:
+        return boss_url
+
+
+async def fetch_boss(
+    session: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    bucket: TokenBucket,
+    bulk_images: dict[str, str],
+    boss_url: str,
+) -> bool:
+    """Resolve and download the main image for one boss page.
+
+    Returns True if an image was saved.
+    """
+    title = _title_from_url(boss_url)
+    # Prefer API to avoid 403 and pick canonical image. The bulk query
+    # covers the common case; misses retry per-title (the API helper is
+    # still synchronous requests code, so run it off the event loop).
+    img_url = bulk_images.get(title)
+    if not img_url:
+        async with semaphore:
+            await bucket.acquire()
+            img_url = await asyncio.to_thread(get_page_image_via_api, title)
+    if not img_url:
+        # Fallback to HTML scrape if API fails; goes through the cached
+        # session so repeat runs replay it from disk.
+        try:
+            async with semaphore:
+                await bucket.acquire()
+                page = await asyncio.to_thread(_http_get_text, boss_url)
+            img_url = pick_best_image_url(HTMLParser(page))
+        except Exception as exc:
+            print(f"Skip {boss_url}: {exc}", file=sys.stderr)
+            return False
+    if not img_url:
+        print(f"No image found for {boss_url}", file=sys.stderr)
+        return False
+    img_url = normalize_image_url(img_url)
+    filename = filename_from_image_url(img_url, fallback=Path(urlparse(boss_url).path).name)
+    out_path = OUTPUT_DIR / filename
+
+    # The filename is deterministic, so a previous successful download
+    # means we can skip the image fetch entirely on re-runs.
+    if out_path.exists() and out_path.stat().st_size > 0:
+        print(f"Exists {out_path.relative_to(ROOT)}, skipping download")
+        return True
+
+    # Trust the URL extension too: after normalize_image_url the common
+    # case is a .png source, and PIL decode+re-encode is wasted on it
+    # even when the server reports a generic Content-Type.
+    lower_url = img_url.lower()
+    is_png_url = lower_url.split('?', 1)[0].endswith('.png') or '.png/revision/' in lower_url
+
+    try:
+        async with semaphore:
+            await bucket.acquire()
+            async with session.stream("GET", img_url) as resp:
+                resp.raise_for_status()
+                content_type = resp.headers.get('Content-Type', '').lower()
+                if is_png_url or 'image/png' in content_type:
+                    # Stream chunks to a .part file and rename into place
+                    # only once the body is complete, so a dropped
+                    # connection can't leave a truncated out_path that
+                    # the exists() short-circuit would trust forever. The
+                    # 1 MiB buffer batches the chunks into few write
+                    # syscalls and the full image never sits in memory.
+                    part_path = out_path.with_suffix(out_path.suffix + ".part")
+                    try:
+                        with open(part_path, "wb", buffering=1 << 20) as f:
+                            async for chunk in resp.aiter_bytes(1 << 16):
+                                f.write(chunk)
+                        os.replace(part_path, out_path)
+                    except BaseException:
+                        try:
+                            os.unlink(part_path)
+                        except OSError:
+                            pass
+                        raise
+                else:
+                    # Needs PIL conversion: stream to a temp file, then
+                    # hand the path to the process pool so the CPU-bound
+                    # re-encode runs outside the GIL and off the loop.
+                    tmp = tempfile.NamedTemporaryFile(
+                        suffix=Path(filename).suffix, delete=False
+                    )
+                    try:
+                        with tmp:
+                            async for chunk in resp.aiter_bytes(1 << 16):
+                                tmp.write(chunk)
+                        loop = asyncio.get_running_loop()
+                        await loop.run_in_executor(
+                            _encode_pool(), _convert_to_png, Path(tmp.name), out_path
+                        )
+                    except BaseException:
+                        try:
+                            os.unlink(tmp.name)
+                        except OSError:
+                            pass
+                        raise
+        print(f"Saved {out_path.relative_to(ROOT)}")
+        return True
+    except Exception as exc:
+        print(f"Failed {boss_url} -> {img_url}: {exc}", file=sys.stderr)
+        return False
+
+
+async def run(urls: list[str]) -> int:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    bucket = TokenBucket(RATE_LIMIT, RATE_BURST)
+    limits = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+    tasks: list[asyncio.Task[bool]] = []
+    # One batched PageImages query resolves nearly every boss up front
+    bulk_images = await asyncio.to_thread(
+        get_page_images_bulk, [_title_from_url(u) for u in urls]
+    )
+    async with httpx.AsyncClient(
+        http2=True,
+        headers=REQUEST_HEADERS,
+        timeout=25,
+        limits=limits,
+        follow_redirects=True,
+    ) as session:
+        async with asyncio.TaskGroup() as tg:
+            for boss_url in urls:
+                tasks.append(
+                    tg.create_task(
+                        fetch_boss(session, semaphore, bucket, bulk_images, boss_url)
+                    )
+                )
+    if _ENCODE_POOL is not None:
+        _ENCODE_POOL.shutdown(wait=True)
+    return sum(1 for t in tasks if t.result())
+
+
 def main() -> int:
     if not URLS_FILE.exists():
         print(f"Missing {URLS_FILE}. Run scrape_boss_urls.py first.", file=sys.stderr)
@@ -206,55 +525,7 @@ def main() -> int:
     with URLS_FILE.open("r", encoding="utf-8") as fh:
         urls = [line.strip() for line in fh if line.strip()]
 
-    total = 0
-    for boss_url in urls:
-        try:
-            # Derive page title from URL path after /wiki/
-            path = urlparse(boss_url).path
-            title = path.split('/wiki/', 1)[1]
-        except Exception:
-            title = boss_url
-        # Prefer API to avoid 403 and pick canonical image
-        img_url = get_page_image_via_api(title)
-        if not img_url:
-            # Fallback to HTML scrape if API fails
-            try:
-                page = http_get(boss_url).text
-                soup = BeautifulSoup(page, "html.parser")
-                img_url = pick_best_image_url(soup)
-            except Exception as exc:
-                print(f"Skip {boss_url}: {exc}", file=sys.stderr)
-                continue
-        if not img_url:
-            print(f"No image found for {boss_url}", file=sys.stderr)
-            continue
-        img_url = normalize_image_url(img_url)
-        filename = filename_from_image_url(img_url, fallback=Path(urlparse(boss_url).path).name)
-        out_path = OUTPUT_DIR / filename
-
-        try:
-            resp = http_get(img_url)
-            content_type = resp.headers.get('Content-Type', '').lower()
-            data = resp.content
-            if 'image/png' in content_type:
-                with open(out_path, "wb") as f:
-                    f.write(data)
-            else:
-                # Convert to PNG
-                try:
-                    img = Image.open(BytesIO(data))
-                    img.save(out_path, format='PNG')
-                except Exception:
-                    # As a last resort, save bytes directly
-                    with open(out_path, "wb") as f:
-                        f.write(data)
-            total += 1
-            print(f"Saved {out_path.relative_to(ROOT)}")
-        except Exception as exc:
-            print(f"Failed {boss_url} -> {img_url}: {exc}", file=sys.stderr)
-            continue
-
-        time.sleep(0.25)
+    total = asyncio.run(run(urls))
 
     print(f"Done. Saved {total} images to {OUTPUT_DIR}")
     return 0
@@ -18,7 +18,9 @@ from typing import Iterable, Set
 from urllib.parse import urljoin, urlparse, urlunparse, urldefrag, unquote
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.parser import HTMLParser
 
 
 CATEGORY_URL = "https://dontstarve.fandom.com/wiki/Category:Boss_Monsters"
@@ -31,16 +33,46 @@ REQUEST_HEADERS = {
     )
 }
 
+# Shared session: all category pages live on the same host, so reusing
+# one connection avoids a TCP+TLS handshake per page.
+SESSION = requests.Session()
+SESSION.headers.update(REQUEST_HEADERS)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    ),
+)
+
 
 def http_get(url: str) -> str:
-    response = requests.get(url, headers=REQUEST_HEADERS, timeout=20)
+    response = SESSION.get(url, timeout=20)
     response.raise_for_status()
     return response.text
 
 
+def http_head_ok(url: str) -> bool:
+    """Cheap probe: is the URL worth a full GET?"""
+    try:
+        response = SESSION.head(url, timeout=20, allow_redirects=True)
+        return response.ok
+    except requests.RequestException:
+        return False
+
+
 def normalize_fandom_url(base_url: str, href: str) -> str | None:
     if not href:
         return None
+    # Most hrefs on a category page are fragments/JS/mailto links; bail
+    # out before paying for urljoin+urlparse on them.
+    if not href.startswith("/wiki/") and not href.startswith("http"):
+        return None
     absolute = urljoin(base_url, href)
     # Drop URL fragment (e.g., #section) and query params
     absolute, _ = urldefrag(absolute)
@@ -60,48 +92,56 @@ def normalize_fandom_url(base_url: str, href: str) -> str | None:
     return unquote(canonical)
 
 
-def extract_member_links(html: str, base_url: str) -> Set[str]:
-    soup = BeautifulSoup(html, "html.parser")
+def extract_member_links_from_tree(tree: HTMLParser, base_url: str) -> Set[str]:
     urls: Set[str] = set()
 
     # Primary: Fandom category items usually use this class
-    for a in soup.select("a.category-page__member-link"):
-        url = normalize_fandom_url(base_url, a.get("href"))
+    for a in tree.css("a.category-page__member-link"):
+        url = normalize_fandom_url(base_url, a.attributes.get("href"))
         if url:
             urls.add(url)
 
-    # Fallback: Look for links within typical content container
+    # Fallback: Look for article links within the content container only;
+    # matching on href avoids materializing every nav/footer anchor.
     if len(urls) < 30:
-        for a in soup.select("#mw-content-text a, a"):
-            url = normalize_fandom_url(base_url, a.get("href"))
+        for a in tree.css("#mw-content-text a[href^='/wiki/']"):
+            url = normalize_fandom_url(base_url, a.attributes.get("href"))
             if url:
                 urls.add(url)
 
     return urls
 
 
-def maybe_follow_pagination(html: str, base_url: str) -> Iterable[str]:
-    """Yield category page URLs to cover pagination if present."""
-    soup = BeautifulSoup(html, "html.parser")
+def maybe_follow_pagination(html: str, base_url: str) -> Iterable[tuple[str, HTMLParser]]:
+    """Yield (page_url, tree) pairs covering pagination if present.
+
+    Each page is parsed exactly once: the tree used to find the next
+    link is the same one handed back for member-link extraction.
+    """
+    tree = HTMLParser(html)
     yielded: Set[str] = set()
     # Current page first
-    yield base_url
+    yield base_url, tree
     yielded.add(base_url)
 
     # Common pagination selectors
-    next_link = soup.select_one('a[rel="next"], a.category-page__pagination-next')
+    next_link = tree.css_first('a[rel="next"], a.category-page__pagination-next')
     while next_link:
-        next_url = urljoin(base_url, next_link.get("href") or "")
+        next_url = urljoin(base_url, next_link.attributes.get("href") or "")
         if not next_url or next_url in yielded:
             break
-        yield next_url
         yielded.add(next_url)
+        # Probe with HEAD first so a dead pagination link doesn't cost a
+        # full page download.
+        if not http_head_ok(next_url):
+            break
         try:
             html = http_get(next_url)
         except Exception:
             break
-        soup = BeautifulSoup(html, "html.parser")
-        next_link = soup.select_one('a[rel="next"], a.category-page__pagination-next')
+        tree = HTMLParser(html)
+        yield next_url, tree
+        next_link = tree.css_first('a[rel="next"], a.category-page__pagination-next')
 
 
 def main() -> int:
@@ -112,13 +152,8 @@ def main() -> int:
         return 2
 
     all_urls: Set[str] = set()
-    for page_url in maybe_follow_pagination(first_html, CATEGORY_URL):
-        try:
-            html = first_html if page_url == CATEGORY_URL else http_get(page_url)
-        except Exception as exc:
-            print(f"Warning: failed to fetch page {page_url}: {exc}", file=sys.stderr)
-            continue
-        urls = extract_member_links(html, page_url)
+    for page_url, tree in maybe_follow_pagination(first_html, CATEGORY_URL):
+        urls = extract_member_links_from_tree(tree, page_url)
         all_urls.update(urls)
         # Be a little polite if there were more pages
         time.sleep(0.4)
@@ -14,7 +14,7 @@ from __future__ import annotations
 
 import csv
 from pathlib import Path
-from urllib.parse import urlparse, unquote
+from urllib.parse import unquote
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -23,17 +23,15 @@ URLS_PATH = ROOT / "scraping" / "boss_urls.txt"
 
 
 def load_boss_urls() -> dict[str, str]:
+    # Every line shares the same /wiki/ prefix, so a plain string split
+    # replaces a full urlparse per line.
+    prefix = "https://dontstarve.fandom.com/wiki/"
     mapping: dict[str, str] = {}
     with URLS_PATH.open("r", encoding="utf-8") as fh:
         for line in fh:
             url = line.strip()
-            if not url:
-                continue
-            path = unquote(urlparse(url).path)
-            if "/wiki/" not in path:
-                continue
-            page = path.split("/wiki/", 1)[1]
-            mapping[page] = url
+            if url.startswith(prefix):
+                mapping[unquote(url[len(prefix):])] = url
     return mapping
 
 
@@ -49,30 +47,53 @@ def normalize_name_to_page(name: str) -> str:
 
 def main() -> int:
     name_to_url = load_boss_urls()
-
-    rows: list[dict[str, str]] = []
+    # Secondary indexes built once so minor case/slash divergences between
+    # CSV names and page titles still match with O(1) lookups instead of
+    # silently dropping the url.
+    ci_index = {k.casefold(): v for k, v in name_to_url.items()}
+    noslash_index = {k.replace('/', '_').casefold(): v for k, v in name_to_url.items()}
+
+    # Positional access: only the 'url' cell changes per row, so there is
+    # no need to build a dict per row the way DictReader/DictWriter do.
     with CSV_PATH.open("r", encoding="utf-8", newline="") as fh:
-        reader = csv.DictReader(fh)
-        fieldnames = list(reader.fieldnames or [])
-        # Ensure 'url' exists in header
-        if 'url' not in fieldnames:
-            fieldnames.insert(1, 'url')
-        for row in reader:
-            rows.append(row)
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        # DictReader skipped blank lines (the file ends with one); the
+        # plain reader yields them as empty lists, so drop them here.
+        rows = [row for row in reader if row]
+
+    name_idx = header.index('name') if 'name' in header else 0
+    if 'url' in header:
+        url_idx = header.index('url')
+    else:
+        # Ensure 'url' exists in header (and an empty cell in each row)
+        url_idx = 1
+        header.insert(url_idx, 'url')
+        for row in rows:
+            row.insert(url_idx, '')
 
+    matched = 0
     for row in rows:
-        name = row.get('name', '').strip().strip('"')
+        name = row[name_idx].strip().strip('"') if name_idx < len(row) else ''
         page = normalize_name_to_page(name)
-        url = name_to_url.get(page, '')
-        row['url'] = url
+        url = (
+            name_to_url.get(page)
+            or ci_index.get(page.casefold())
+            or noslash_index.get(page.replace('/', '_').casefold(), '')
+        )
+        # Pad short rows so the positional assignment cannot go out of range
+        while len(row) <= url_idx:
+            row.append('')
+        row[url_idx] = url
+        if url:
+            matched += 1
 
     with CSV_PATH.open("w", encoding="utf-8", newline="") as fh:
-        writer = csv.DictWriter(fh, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        writer.writerows(rows)
 
-    print(f"Updated URLs for {sum(1 for r in rows if r.get('url'))}/{len(rows)} rows")
+    print(f"Updated URLs for {matched}/{len(rows)} rows")
     return 0
 
 